@@ -18,4 +18,5 @@ setuptools.setup(
     packages=setuptools.find_packages("src"),
     package_dir={"": "src"},
     python_requires=">=3.9",
+    extras_require={"fast": ["orjson"]},
 )
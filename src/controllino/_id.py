@@ -6,13 +6,13 @@ from __future__ import annotations
 
 """Utility module for job ID handling."""
 
-import json
+import threading
 
 
 class IdManager:
-    """Dispenses and recycles IDs.
+    """Dispenses and recycles integer IDs.
 
-    Beware! The ``pop`` and ``put`` operations are *not* thread-safe.
+    The ``pop`` and ``put`` operations are thread-safe.
     """
 
     def __init__(self, size: int = 2**8 - 1) -> None:
@@ -20,64 +20,43 @@ class IdManager:
         size: The maximum number of IDs
         """
         self._size = size
-        self._queue = list(range(size))
+        self._free = (1 << size) - 1  # Bit ``i`` is set iff ID ``i`` is free.
+        self._next = 0  # The ID to start searching for a free ID from.
+        self._lock = threading.Lock()
 
-    def pop(self) -> Id:
+    def pop(self) -> int:
         """Get a job ID.
 
         Raises:
             RuntimeError: If the maximum number of IDs is exceeded
-        """
-        # FIXME Raise a more specific error on empty queue!
-        if not self._queue:
-            raise RuntimeError("maximum number of jobs exceeded")
-        return Id(self._queue.pop(0), self)
-
-    def put(self, value) -> None:
-        """Recycle an ID."""
-        self._queue.append(value)
-
-
-class Id:
-    """A disposable ID which is tied to a managed which is responsible
-    for recycling.
 
-    The ID wraps an integer value which is used to identify the ID (any
-    type of wrapped value is possible, but an immutable is prefered). If
-    the ``Id`` object is serialized using ``json``, then the wrapped
-    value must be JSON-serializable (see ``JsonEncoder``).
-    """
-
-    def __init__(self, value: int, manager: IdManager) -> None:
-        """Args:
-        value: The wrapped value
-        manager:
-            A reference to the manager that ``self`` was issued from
+        IDs are dispensed round-robin, so a recycled ID is not reused
+        until all other free IDs have been dispensed.
         """
-        self._value = value
-        self._manager = manager
-
-    @property
-    def value(self) -> int:
-        """The wrapped value."""
-        return self._value
-
-    def destroy(self) -> None:
-        """Destroy/recycle the ID.
-
-        In most use-cases, this method should only be called before
-        deleting ``self``.
-
-        We do not override ``Id.__del__``, as we do not want to rely on
-        garbage collection occuring in a timely fashion.
+        with self._lock:
+            # FIXME Raise a more specific error on empty queue!
+            if not self._free:
+                raise RuntimeError("maximum number of jobs exceeded")
+            candidates = self._free >> self._next << self._next
+            if not candidates:
+                candidates = self._free
+            lowest = candidates & -candidates
+            value = lowest.bit_length() - 1
+            self._free ^= lowest
+            self._next = value + 1
+            return value
+
+    def put(self, value: int) -> None:
+        """Recycle an ID.
+
+        In most use-cases, this method should only be called once the ID
+        is no longer in use.
         """
-        self._manager.put(self._value)
-
-
-# FIXME Maybe just serialize ``id.value`` directly?
-class JsonEncoder(json.encoder.JSONEncoder):
-    def default(self, o):
-        """Serialize an ``Id`` by serializing its wrapped value."""
-        if isinstance(o, Id):
-            return o.value
-        super().default()
+        with self._lock:
+            self._free |= 1 << value
+
+    def reset(self) -> None:
+        """Recycle all IDs and dispense IDs from ``0`` again."""
+        with self._lock:
+            self._free = (1 << self._size) - 1
+            self._next = 0
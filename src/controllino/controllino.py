@@ -5,28 +5,43 @@
 from __future__ import annotations
 
 import abc
+import array
 import collections
+import functools
 import json
 import queue
 import serial
 import threading
-import traceback
-import time
-from typing import Callable, TypeVar
+from typing import Any, Callable, ClassVar, NamedTuple, Optional, TypeVar, Union
 
 from controllino import _id
 
+try:
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+    # ``json.dumps`` creates a new encoder on every call if any option
+    # is passed, so reuse a single one.
+    _json_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def _json_dumps(data: dict) -> bytes:
+        # Same output as ``orjson.dumps``, except for non-ASCII
+        # characters, which are escaped.
+        return _json_encode(data).encode("utf-8")
+
+
 _VALUE_TYPE = TypeVar("ValueType")
 _RX = "RX_"
 _READY = "READY"
 _ERROR = "ERROR"  # General error message, not bound to specific job
 _ERR = "ERR_"  # Error message bound to job
-_INVALID = _ERR + "_COMMAND_INVALID"
+_INVALID = _ERR + "COMMAND_INVALID"
 _DEBUG = "DEBUG"
 GRAIN = 0.001
 DELIM = b"\r\n"
-NOT_FOUND = object()
-verbose = False
+MAX_BATCH = 32  # Maximum number of commands per write
+JOIN_TIMEOUT = 1.0  # Time to wait for the daemons to terminate on ``kill``
 
 # TODO Forward ERR_ commands to the respective futures!
 
@@ -49,7 +64,10 @@ class Base:
     protocoll.
 
     Controlls two daemons, ``_message_thread`` and ``_command_thread``,
-    which handle incoming and outgoing messages, respectively.
+    which handle incoming and outgoing messages, respectively. The
+    message daemon is the only thread that reads from the serial device
+    and the command daemon is the only thread that writes to it, so
+    access to the device is not synchronized.
     """
 
     def __init__(
@@ -73,14 +91,25 @@ class Base:
 
         By default, the debug callback will write any debug information
         into ``stdout``.
+
+        Note that the read timeout of ``ser`` is overwritten, as the
+        message daemon uses blocking reads. If ``ser`` supports
+        ``cancel_read``, reads block until data arrives or the API is
+        stopped; otherwise, they time out after ``GRAIN`` seconds.
         """
         self._serial = ser
-        self._serial_lock = threading.Lock()
-        self._pending = []  # Commands waiting for a reply.
-        self._pending_lock = threading.Lock()
-        self._cmd_queue = queue.Queue()
+        self._serial.timeout = None if hasattr(ser, "cancel_read") else GRAIN
+        # Commands waiting for a reply, by job id. Only single-key
+        # operations are performed on ``_pending``, which are atomic, so
+        # it is shared with the message daemon without a lock.
+        self._pending: dict[int, Command] = {}
+        # Notified by the message daemon when ``_pending`` becomes empty.
+        self._idle = threading.Condition()
+        self._cmd_queue = collections.deque()  # Encoded submitted commands.
+        self._cmd_ready = threading.Event()
         self._error_queue = queue.Queue()
         self._stop_event = threading.Event()
+        self._id_manager = _id.IdManager()
         if error_callback is None:
 
             def error_callback(e):
@@ -93,21 +122,20 @@ class Base:
 
         self._message_thread = _MessageThread(
             self._serial,
-            self._serial_lock,
             self._pending,
-            self._pending_lock,
+            self._idle,
+            self._id_manager,
             self._stop_event,
             error_callback,
             debug_callback,
         )
         self._command_thread = _CommandThread(
             self._serial,
-            self._serial_lock,
             self._cmd_queue,
+            self._cmd_ready,
             self._stop_event,
             error_callback,
         )
-        self._id_manager = _id.IdManager()
         self._message_thread.start()
         self._command_thread.start()
 
@@ -121,12 +149,21 @@ class Base:
             RuntimeError:
                 If submitting the commnads would exceeded the maximum
                 number of jobs
+            TypeError: If the command data is not JSON serializable
+
+        The command is encoded on the calling thread, so the command
+        daemon only needs to write it to the serial device.
         """
         cmd.job = self._id_manager.pop()
+        try:
+            msg = cmd.encode()
+        except Exception:
+            self._id_manager.put(cmd.job)
+            raise
 
-        with self._pending_lock:
-            self._pending.append(cmd)
-        self._cmd_queue.put(cmd)
+        self._pending[cmd.job] = cmd
+        self._cmd_queue.append(msg)
+        self._cmd_ready.set()
 
         return cmd.future
 
@@ -147,9 +184,24 @@ class Base:
             return
 
         if abort:
-            self._stop_event.set()
+            self._stop()
         raise e
 
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until no commands are pending.
+
+        Args:
+            timeout: Timeout in seconds
+
+        Returns:
+            ``True`` if and only if no commands are pending
+
+        Note that commands submitted while waiting are waited for as
+        well.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
     def open(self) -> tuple[Future]:
         """Query readiness from the client device.
 
@@ -164,15 +216,39 @@ class Base:
         # for the device to signal readiness.
         cmd = CmdReady()
         cmd.job = self._id_manager.pop()
-        with self._pending_lock:
-            self._pending.append(cmd)
+        self._pending[cmd.job] = cmd
         return cmd.future
 
     def kill(self):
-        """Close without grace."""
-        self._stop_event.set()
+        """Close without grace.
+
+        The daemons are given ``JOIN_TIMEOUT`` seconds to terminate
+        before the serial device is closed, so that they don't access
+        the closed device.
+        """
+        self._stop()
+        current = threading.current_thread()
+        for thread in (self._message_thread, self._command_thread):
+            if thread is not current:
+                thread.join(JOIN_TIMEOUT)
         self._serial.close()
 
+    def _reset(self) -> None:
+        """Drop all pending commands and recycle their job ids.
+
+        The futures of the dropped commands are never done. Only call
+        this while the message daemon is idle.
+        """
+        self._pending.clear()
+        self._id_manager.reset()
+
+    def _stop(self) -> None:
+        """Signal the daemons to terminate."""
+        self._stop_event.set()
+        self._cmd_ready.set()
+        if hasattr(self._serial, "cancel_read"):
+            self._serial.cancel_read()
+
 
 class Controllino(Base):
     """Utility API class which offers class methods for command
@@ -221,27 +297,26 @@ class _MessageThread(threading.Thread):
     device.
     """
 
-    # FIXME Don't share ``pending`` and ``pending_lock`` with the
-    # ``Base`` object. Instead, encapsulate ``pending(_lock)?`` and use
-    # a ``push`` method to thread-safely enqueue commands.
+    # FIXME Don't share ``pending`` with the ``Base`` object. Instead,
+    # encapsulate ``pending`` and use a ``push`` method to enqueue
+    # commands.
     def __init__(
         self,
         ser: serial.Serial,
-        serial_lock: threading.Lock,
-        pending: list[Command],
-        pending_lock: threading.Lock,
+        pending: dict[int, Command],
+        idle: threading.Condition,
+        id_manager: _id.IdManager,
         stop_event: threading.Event,
         error_callback: Optional[Callable[[Exception], None]],
         debug_callback: Optional[Callable[[str], None]] = None,
     ) -> None:
         """Args:
         ser: The underlying serial device
-        serial_lock:
-            A lock for thread-safe access to the underlying serial
-            device
         pending:
-            A list of pending responses from the client device that
-            the daemon must handle
+            The commands awaiting responses from the client device that
+            the daemon must handle, keyed by job id
+        idle: A condition to notify when ``pending`` becomes empty
+        id_manager: The manager that issued the job ids of ``pending``
         stop_event: An event for terminating the daemon
         error_callback:
             A callback function for critical errors in this daemon
@@ -253,13 +328,14 @@ class _MessageThread(threading.Thread):
         self.daemon = True
 
         self._serial = ser
-        self._serial_lock = serial_lock
         self._stop_event = stop_event
         self._pending = pending
-        self._pending_lock = pending_lock
+        self._idle = idle
+        self._id_manager = id_manager
         self._error_callback = error_callback
         self._debug_callback = debug_callback
-        self._buffer = b""
+        self._buffer = bytearray()
+        self._scan_pos = 0  # Position up to which ``_buffer`` has no DELIM
 
     def run(self):
         # FIXME The catch-all is for logic errors. Design is meh and not
@@ -267,7 +343,6 @@ class _MessageThread(threading.Thread):
         try:
             while not self._stop_event.is_set():
                 self._run_impl()
-                time.sleep(GRAIN)
         except Exception as e:
             self._error_callback(e)
         # Note that there is no clear separation of fatal and non-fatal
@@ -278,25 +353,35 @@ class _MessageThread(threading.Thread):
         # separate the errors that may raise fatal and non-fatal errors.
 
     def _run_impl(self):
-        with self._serial_lock:
-            byte_count = self._serial.in_waiting
-
-        if byte_count == 0:
-            return
-
-        with self._serial_lock:
-            self._buffer += self._serial.read(byte_count)
-
-        chunks: list[bytes] = self._buffer.split(DELIM)
-        self._buffer = chunks.pop(-1)
-        chunks = [each + DELIM for each in chunks]
-
-        assert all(each.endswith(DELIM) for each in chunks)
-        replies = [
-            _decode(each) for each in chunks
-        ]  # Note: json.JSONDecodeError is considered a logic error and will result in termination of the loop.  # noqa: E501
-        for each in replies:
-            self._receive(each)
+        # Block until at least one byte arrives (or the read times out or
+        # is cancelled), then drain whatever else is already waiting.
+        try:
+            data = self._serial.read(1)
+            if not data:
+                return
+            data += self._serial.read(self._serial.in_waiting)
+        except Exception:
+            # The device may be closed on shutdown, in which case pyserial
+            # doesn't necessarily raise a ``SerialException``.
+            if self._stop_event.is_set():
+                return
+            raise
+        self._buffer.extend(data)
+
+        # Decode the complete messages in place and remove them from the
+        # buffer in one go, keeping the trailing partial message. Note
+        # that a ``DecodeError`` is considered a logic error and will
+        # result in termination of the loop.
+        start = 0
+        end = self._buffer.find(DELIM, self._scan_pos)
+        while end != -1:
+            self._receive(_decode(self._buffer[start:end]))
+            start = end + len(DELIM)
+            end = self._buffer.find(DELIM, start)
+        del self._buffer[:start]
+        # Don't rescan the partial message on the next read. Its last
+        # byte may be the first byte of a split delimiter.
+        self._scan_pos = max(len(self._buffer) - len(DELIM) + 1, 0)
 
     def _receive(self, reply):
         command_type = reply["command"]  # TODO Raise error if command field is missing!
@@ -307,7 +392,7 @@ class _MessageThread(threading.Thread):
                 self._error_callback(
                     ControllinoError(f"controllino: received error msg: {reply}")
                 )
-            if command_type == _DEBUG:
+            elif command_type == _DEBUG:
                 self._debug_callback(reply["info"])
             else:
                 self._error_callback(
@@ -317,27 +402,24 @@ class _MessageThread(threading.Thread):
                 )
             return
 
-        with self._pending_lock:
-            index = next(
-                (
-                    index
-                    for index, each in enumerate(self._pending)
-                    if each.job.value == job
-                ),
-                None,
-            )
-            if index is None:
-                self._error_callback(
-                    ControllinoError(
-                        f"controllino: receiver reply with invalid job id: {reply}"
-                    )
+        cmd = self._pending.get(job)
+        if cmd is None:
+            self._error_callback(
+                ControllinoError(
+                    f"controllino: receiver reply with invalid job id: {reply}"
                 )
-                return
-            cmd = self._pending[index]
+            )
+            return
 
-            if cmd.update(reply):
-                cmd.job.destroy()
-                del self._pending[index]
+        # The job id must not be recycled before ``cmd`` is removed, as
+        # a new command with the same id could otherwise be removed
+        # instead.
+        if cmd.update(reply):
+            del self._pending[job]
+            self._id_manager.put(job)
+            if not self._pending:
+                with self._idle:
+                    self._idle.notify_all()
 
 
 # Based on
@@ -350,17 +432,17 @@ class _CommandThread(threading.Thread):
     def __init__(
         self,
         ser: serial.Serial,
-        serial_lock: threading.Lock,
-        cmd_queue: queue.Queue,
+        cmd_queue: collections.deque,
+        cmd_ready: threading.Event,
         stop_event: threading.Event,
         error_callback: Optional[Callable[[Exception], None]] = None,
     ) -> None:
         """Args:
         ser: The underlying serial device
-        serial_lock:
-            A lock for thread-safe access to the underlying serial
-            device
-        cmd_queue: A queue of submitted commands
+        cmd_queue: A queue of encoded submitted commands
+        cmd_ready:
+            An event which is set when commands are queued or
+            ``stop_event`` is set
         stop_event: An event for terminating the daemon
         error_callback:
             A callback function for critical errors in this daemon
@@ -369,20 +451,27 @@ class _CommandThread(threading.Thread):
         self.daemon = True
 
         self._serial = ser
-        self._serial_lock = serial_lock
         self._cmd_queue = cmd_queue
+        self._cmd_ready = cmd_ready
         self._stop_event = stop_event
         self._error_callback = error_callback
 
     def run(self):
         try:
-            while not self._stop_event.is_set():
-                try:
-                    cmd = self._cmd_queue.get_nowait()
-                except queue.Empty:
-                    time.sleep(GRAIN)
-                    continue
-                self._serial.write(_encode(cmd.serialize()))
+            while True:
+                # Clear the event *before* draining the queue, so that no
+                # command queued in the meantime is missed.
+                self._cmd_ready.wait()
+                self._cmd_ready.clear()
+                if self._stop_event.is_set():
+                    break
+                # Coalesce the commands that are already queued into
+                # writes of at most ``MAX_BATCH`` commands.
+                while self._cmd_queue:
+                    batch = []
+                    while self._cmd_queue and len(batch) < MAX_BATCH:
+                        batch.append(self._cmd_queue.popleft())
+                    self._serial.write(b"".join(batch))
         except Exception as e:
             self._error_callback(e)
 
@@ -395,10 +484,29 @@ def _encode(data: dict) -> bytes:
         data: The message to be encoded
 
     """
-    msg = json.dumps(data, cls=_id.JsonEncoder)
-    msg += "\r\n"
-    msg = msg.encode("utf-8")
-    return msg
+    return _json_dumps(data) + DELIM
+
+
+_JOB = b',"job":'
+_SUFFIX = b"}" + DELIM
+
+
+def _encode_prefix(data: dict) -> bytes:
+    """Encode a message up to the value of its job id.
+
+    Args:
+        data: The message to be encoded, without job id
+
+    The job id value and ``_SUFFIX`` must be appended to the result to
+    obtain the encoded message (see ``Command.encode``).
+    """
+    return _encode(data)[: -len(_SUFFIX)] + _JOB
+
+
+@functools.lru_cache(maxsize=256, typed=True)
+def _encode_pin_prefix(cmd_name: str, pin: str) -> bytes:
+    """Cached ``_encode_prefix`` for commands whose data is a pin."""
+    return _encode_prefix({"command": cmd_name, "pin": pin})
 
 
 def _decode(msg: bytes) -> dict:
@@ -414,7 +522,7 @@ def _decode(msg: bytes) -> dict:
     retry = True
     while True:
         try:
-            return json.loads(msg)
+            return _json_loads(msg)
         except json.decoder.JSONDecodeError as e:
             if not retry:
                 raise DecodeError(
@@ -430,6 +538,9 @@ def _decode(msg: bytes) -> dict:
             msg = msg[left : right + 1]
 
 
+_COND_LOCK = threading.Lock()  # Guards the creation of ``Future._cond``
+
+
 class Future:
     """Class that represents future results of pending commands on
     daemon threads.
@@ -441,12 +552,19 @@ class Future:
     If the computation on the daemon thread has raised an error instead,
     the daemon uses ``set_error()`` to move the error into the future.
     In this case the error is reraised if ``result()`` is called.
+
+    Most futures are done before anybody waits for them, so the
+    condition used for waiting is only created by the first call to
+    ``wait``.
     """
 
+    __slots__ = ("_result", "_error", "_done", "_cond")
+
     def __init__(self):
         self._result = None
         self._error = None
-        self._done = threading.Event()
+        self._done = False
+        self._cond: Optional[threading.Condition] = None
 
     def result(self) -> Any:
         """Get the result of the future.
@@ -459,9 +577,9 @@ class Future:
                 The error that occured during computation, provided it
                 was set
 
-        Shall only be accessed when the future is done. Calling this
-        method before the future is done is undefined behavior.
+        If the future is not done yet, this method blocks until it is.
         """
+        self.wait()
         if self._error is not None:
             raise self._error
         return self._result
@@ -475,7 +593,7 @@ class Future:
         The result will be return when ``result`` is called.
         """
         self._result = result
-        self._done.set()
+        self._set_done()
 
     def set_error(self, error: Exception) -> None:
         """Set an error as the result of the future and mark the future
@@ -489,7 +607,7 @@ class Future:
         marked as *done* when calling ``set_error``.
         """
         self._error = error
-        self._done.set()
+        self._set_done()
 
     def wait(self, timeout: Optional[float] = None) -> bool:
         """Thread-safely wait until the future is done.
@@ -504,13 +622,31 @@ class Future:
         ``timeout`` seconds. Otherwise, the function will halt until the
         future is done.
         """
-        return self._done.wait(timeout)
+        if self._done:
+            return True
+        if self._cond is None:
+            with _COND_LOCK:
+                if self._cond is None:
+                    self._cond = threading.Condition()
+        # ``_set_done`` sets ``_done`` before checking for ``_cond``, so
+        # if ``_cond`` was created too late to be notified, ``_done`` is
+        # already set when the predicate is checked.
+        with self._cond:
+            return self._cond.wait_for(lambda: self._done, timeout)
 
     def done(self) -> bool:
         """Thread-safely return ``True`` if and only if the future is
         done.
         """
-        return self.wait(-1)
+        return self._done
+
+    def _set_done(self) -> None:
+        """Mark the future as done and wake up any waiting threads."""
+        self._done = True
+        cond = self._cond
+        if cond is not None:
+            with cond:
+                cond.notify_all()
 
 
 # }}} serial device
@@ -523,7 +659,7 @@ class Command(abc.ABC):  # FIXME Should be called AbstractCommand...?
     """ABC for commands issued to client device.
 
     Attributes:
-        job (Optional[_id.Id]): The job id of the command
+        job (Optional[int]): The job id of the command
 
     Commands are identified (on the server and the client) using their
     manually assigned *job id*, which must be unique in the sense that
@@ -539,11 +675,35 @@ class Command(abc.ABC):  # FIXME Should be called AbstractCommand...?
     successfully), the reply from the client device has arrived on the
     server and the result or error of the computation on the client
     device was set as result of the future.
+
+    Subclasses must set the class attribute ``_CMD_NAME`` to the value
+    of the ``"command"`` field. The commands of replies and error
+    replies are derived from it.
     """
 
+    __slots__ = ("_future", "job")
+
+    _CMD_NAME: ClassVar[str]  # The value of the ``"command"`` field
+    _RX_NAME: ClassVar[str]  # The command of replies, set automatically
+    _ERR_NAME: ClassVar[str]  # The command of error replies, set automatically
+    # Encoded command data for commands whose data does not depend on
+    # the instance (see ``encode``)
+    _PREFIX: ClassVar[Optional[bytes]] = None
+
     def __init__(self):
         self._future = Future()
-        self.job: Optional[_id.Id] = None
+        self.job: Optional[int] = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if not hasattr(cls, "_CMD_NAME"):
+            raise TypeError(f"{cls.__name__} does not define _CMD_NAME")
+        cls._RX_NAME = _RX + cls._CMD_NAME
+        cls._ERR_NAME = _ERR + cls._CMD_NAME
+        # The fast path of ``encode`` bypasses ``serialize``, so it must
+        # not be used if ``serialize`` is overridden.
+        if cls.serialize is not Command.serialize and cls.encode is Command.encode:
+            cls.encode = Command._encode_serialized
 
     @property
     def future(self) -> Union[Future, tuple[Future, ...]]:
@@ -569,6 +729,24 @@ class Command(abc.ABC):  # FIXME Should be called AbstractCommand...?
         data["job"] = self.job
         return data
 
+    def encode(self) -> bytes:
+        """Encode the command according to the Controllino protocol.
+
+        Equivalent to ``_encode(self.serialize())``, but only the job id
+        is encoded if ``_PREFIX`` is set. Subclasses which override
+        ``serialize`` are encoded using ``_encode(self.serialize())``.
+        """
+        prefix = self._PREFIX
+        if prefix is None:
+            prefix = self._prefix()
+        return b"%b%d%b" % (prefix, self.job, _SUFFIX)
+
+    def _encode_serialized(self) -> bytes:
+        """Implementation of ``encode`` for subclasses which override
+        ``serialize``.
+        """
+        return _encode(self.serialize())
+
     def update(self, reply: dict) -> bool:
         """Update the state of the pending command.
 
@@ -580,7 +758,7 @@ class Command(abc.ABC):  # FIXME Should be called AbstractCommand...?
         if self._error(self._future, reply):
             return True
 
-        if reply["command"] == _RX + self.serialize()["command"]:
+        if reply["command"] == self._RX_NAME:
             return self._update(reply)
 
     def _serialize(self) -> dict:
@@ -591,6 +769,14 @@ class Command(abc.ABC):  # FIXME Should be called AbstractCommand...?
         """
         pass
 
+    def _prefix(self) -> bytes:
+        """Encode the command data up to the value of the job id.
+
+        This is a utility method, used by ``encode`` if ``_PREFIX`` is
+        not set. May be overridden by subclasses to cache the result.
+        """
+        return _encode_prefix(self._serialize())
+
     def _update(self, reply: dict) -> bool:
         """Mark the command's future as done.
 
@@ -613,10 +799,7 @@ class Command(abc.ABC):  # FIXME Should be called AbstractCommand...?
         ``update``.
         """
         command_type = reply["command"]  # TODO Raise error if command field is missing!
-        if (
-            command_type == _ERR + self.serialize()["command"]
-            or command_type == "ERR_COMMAND_INVALID"
-        ):
+        if command_type == self._ERR_NAME or command_type == _INVALID:
             future.set_error(ControllinoError(f"controllino error: {reply}"))
             return True
 
@@ -624,6 +807,9 @@ class Command(abc.ABC):  # FIXME Should be called AbstractCommand...?
 
 
 class CmdGetSignal(Command):
+    __slots__ = ("_signal",)
+    _CMD_NAME = "GET_INPUT"
+
     def __init__(self, signal: str):
         super().__init__()
         self._signal = signal
@@ -632,36 +818,52 @@ class CmdGetSignal(Command):
         self.future.set_result(reply["level"])
         return True
 
+    def _prefix(self) -> bytes:
+        return _encode_pin_prefix(self._CMD_NAME, self._signal)
+
     def _serialize(self) -> dict:
-        return {"command": "GET_INPUT", "pin": self._signal}
+        return {"command": self._CMD_NAME, "pin": self._signal}
 
 
 class CmdSetSignal(Command):
+    __slots__ = ("_signal", "_value")
+    _CMD_NAME = "SET_OUTPUT"
+
     def __init__(self, signal: str, value: Any) -> None:
         super().__init__()
         self._signal = signal
         self._value = value
 
     def _serialize(self) -> dict:
-        return {"command": "SET_OUTPUT", "pin": self._signal, "level": self._value}
+        return {"command": self._CMD_NAME, "pin": self._signal, "level": self._value}
 
 
 class CmdReady(Command):
+    __slots__ = ()
+    _CMD_NAME = _READY
+    _PREFIX = _encode_prefix({"command": _CMD_NAME})
+
     def _serialize(self) -> dict:
-        return {"command": _READY}
+        return {"command": self._CMD_NAME}
 
 
 class CmdSetPinMode(Command):
+    __slots__ = ("_pin", "_mode")
+    _CMD_NAME = "SET_PIN_MODE"
+
     def __init__(self, pin: str, mode: str) -> None:
         super().__init__()
         self._pin = pin
         self._mode = mode
 
     def _serialize(self) -> dict:
-        return {"command": "SET_PIN_MODE", "pin": self._pin, "mode": self._mode}
+        return {"command": self._CMD_NAME, "pin": self._pin, "mode": self._mode}
 
 
 class CmdGetPinMode(Command):
+    __slots__ = ("_pin",)
+    _CMD_NAME = "GET_PIN_MODE"
+
     def __init__(self, pin: str) -> None:
         super().__init__()
         self._pin = pin
@@ -670,35 +872,58 @@ class CmdGetPinMode(Command):
         self.future.set_result(reply["mode"])
         return True
 
+    def _prefix(self) -> bytes:
+        return _encode_pin_prefix(self._CMD_NAME, self._pin)
+
     def _serialize(self) -> dict:
-        return {"command": "GET_PIN_MODE", "pin": self._pin}
+        return {"command": self._CMD_NAME, "pin": self._pin}
 
 
 class CmdLoadPinModes(Command):
+    __slots__ = ()
+    _CMD_NAME = "LOAD_PIN_MODES"
+    _PREFIX = _encode_prefix({"command": _CMD_NAME})
+
     def _serialize(self) -> dict:
-        return {"command": "LOAD_PIN_MODES"}
+        return {"command": self._CMD_NAME}
 
 
 class CmdSavePinModes(Command):
+    __slots__ = ()
+    _CMD_NAME = "SAVE_PIN_MODES"
+    _PREFIX = _encode_prefix({"command": _CMD_NAME})
+
     def _serialize(self) -> dict:
-        return {"command": "SAVE_PIN_MODES"}
+        return {"command": self._CMD_NAME}
 
 
 class CmdResetPinModes(Command):
+    __slots__ = ()
+    _CMD_NAME = "RESET_PIN_MODES"
+    _PREFIX = _encode_prefix({"command": _CMD_NAME})
+
     def _serialize(self) -> dict:
-        return {"command": "RESET_PIN_MODES"}
+        return {"command": self._CMD_NAME}
 
 
 class CmdTriggerPulse(Command):
+    __slots__ = ("_pin",)
+    _CMD_NAME = "TRIGGER_PULSE"
+
     def __init__(self, pin: str) -> None:
         super().__init__()
         self._pin = pin
 
+    def _prefix(self) -> bytes:
+        return _encode_pin_prefix(self._CMD_NAME, self._pin)
+
     def _serialize(self) -> dict:
-        return {"command": "TRIGGER_PULSE", "pin": self._pin}
+        return {"command": self._CMD_NAME, "pin": self._pin}
 
 
-TimeSeries = collections.namedtuple("TimeSeries", ("time", "values"))
+class TimeSeries(NamedTuple):
+    time: array.array
+    values: array.array
 
 
 class CmdLogSignal(Command):
@@ -713,7 +938,10 @@ class CmdLogSignal(Command):
     If a logging request is declined, the request future will fail and
     the process future will wait forever. If a request if accepted but
     the  logging job fails later on, the process future will finish and
-    raise an error.
+    raise an error. The result of the process future is a ``TimeSeries``
+    whose time and values are stored as ``array.array("d")``. These
+    support the buffer protocol, so ``numpy.frombuffer`` may be used to
+    view them as arrays without copying.
 
     Example:
         >>> api = controllino.Controllino(...)
@@ -728,13 +956,16 @@ class CmdLogSignal(Command):
 
     """
 
+    __slots__ = ("_signal", "_period", "_time", "_values")
+    _CMD_NAME = "LOG_SIGNAL"
+
     def __init__(self, signal: str, period: int) -> None:
         super().__init__()
         self._future = (Future(), Future())
         self._signal = signal
         self._period = period
-        self._time = []
-        self._values = []
+        self._time = array.array("d")
+        self._values = array.array("d")
 
     def update(self, reply: dict) -> bool:
         if not self._future[0].done():  # First pass!
@@ -753,16 +984,22 @@ class CmdLogSignal(Command):
         return done
 
     def _serialize(self) -> dict:
-        return {"command": "LOG_SIGNAL", "pin": self._signal, "period": self._period}
+        return {"command": self._CMD_NAME, "pin": self._signal, "period": self._period}
 
 
 class CmdEndLogSignal(Command):
+    __slots__ = ("_signal",)
+    _CMD_NAME = "END_LOG_SIGNAL"
+
     def __init__(self, signal: str) -> None:
         super().__init__()
         self._signal = signal
 
+    def _prefix(self) -> bytes:
+        return _encode_pin_prefix(self._CMD_NAME, self._signal)
+
     def _serialize(self) -> dict:
-        return {"command": "END_LOG_SIGNAL", "pin": self._signal}
+        return {"command": self._CMD_NAME, "pin": self._signal}
 
 
 # }}} commands
@@ -2,11 +2,9 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import functools
+import array
 import pytest
-import time
-
-from unittest import mock
+import threading
 
 from controllino import controllino
 
@@ -14,265 +12,445 @@ WAIT = 0.1
 TIMEOUT = 1.0
 
 
+# Encoded frames used in the tests, keyed by name.
+FRAMES = {
+    name: controllino._encode(data)
+    for name, data in {
+        "rx_ready": {"command": "RX_READY", "job": 0},
+        "rx_stop": {"command": "RX_STOP", "job": 1},
+        "set_output": {"command": "SET_OUTPUT", "pin": "DAC0", "level": 12, "job": 1},
+        "rx_set_output": {
+            "command": "RX_SET_OUTPUT",
+            "pin": "DAC0",
+            "level": 12,
+            "job": 1,
+        },
+        "get_input": {"command": "GET_INPUT", "pin": "A0", "job": 1},
+        "rx_get_input": {
+            "command": "RX_GET_INPUT",
+            "pin": "A0",
+            "level": 123,
+            "job": 1,
+        },
+        "rx_get_input_level_1": {
+            "command": "RX_GET_INPUT",
+            "pin": "A0",
+            "level": 1,
+            "job": 1,
+        },
+        "rx_get_input_a1": {
+            "command": "RX_GET_INPUT",
+            "pin": "A1",
+            "level": 123,
+            "job": 1,
+        },
+        "rx_get_input_a2": {
+            "command": "RX_GET_INPUT",
+            "pin": "A2",
+            "level": -0.12,
+            "job": 1,
+        },
+        "rx_get_input_a2_job_2": {
+            "command": "RX_GET_INPUT",
+            "pin": "A2",
+            "level": 456,
+            "job": 2,
+        },
+        "set_pin_mode": {
+            "command": "SET_PIN_MODE",
+            "pin": "D30",
+            "mode": "INPUT",
+            "job": 1,
+        },
+        "rx_set_pin_mode": {
+            "command": "RX_SET_PIN_MODE",
+            "pin": "D30",
+            "mode": "INPUT",
+            "job": 1,
+        },
+        "get_pin_mode": {"command": "GET_PIN_MODE", "pin": "D30", "job": 1},
+        "rx_get_pin_mode": {
+            "command": "RX_GET_PIN_MODE",
+            "pin": "D30",
+            "mode": "INPUT",
+            "job": 1,
+        },
+        "load_pin_modes": {"command": "LOAD_PIN_MODES", "job": 1},
+        "rx_load_pin_modes": {"command": "RX_LOAD_PIN_MODES", "job": 1},
+        "err_load_pin_modes": {"command": "ERR_LOAD_PIN_MODES", "job": 1},
+        "save_pin_modes": {"command": "SAVE_PIN_MODES", "job": 1},
+        "rx_save_pin_modes": {"command": "RX_SAVE_PIN_MODES", "job": 1},
+        "reset_pin_modes": {"command": "RESET_PIN_MODES", "job": 1},
+        "rx_reset_pin_modes": {"command": "RX_RESET_PIN_MODES", "job": 1},
+        "trigger_pulse": {"command": "TRIGGER_PULSE", "pin": "D40", "job": 1},
+        "rx_trigger_pulse": {"command": "RX_TRIGGER_PULSE", "pin": "D40", "job": 1},
+        "err_command_invalid": {"command": "ERR_COMMAND_INVALID", "job": 1},
+        "err_log_signal": {"command": "ERR_LOG_SIGNAL", "job": 1},
+        "rx_end_log_signal": {"command": "RX_END_LOG_SIGNAL", "pin": "A0", "job": 1},
+        "debug": {"command": "DEBUG", "info": "foo"},
+        **{
+            f"rx_log_signal_{i}": {
+                "command": "RX_LOG_SIGNAL",
+                "pin": "A0",
+                "job": 1,
+                "time": time,
+                "value": value,
+                "done": done,
+            }
+            for i, (time, value, done) in enumerate(
+                [
+                    (0.0, 1.0, False),
+                    (1.0, -0.5, False),
+                    (2.0, -2.0, False),
+                    (3.0, -3.5, True),
+                ]
+            )
+        },
+    }.items()
+}
+
+FAILURE_CASES = [
+    pytest.param(
+        controllino._encode({"command": "RX_UNKNOWN", "job": 8}),
+        controllino.ControllinoError,
+        id="unexpected job id",
+    ),
+    pytest.param(
+        controllino._encode({"command": "ERR_PANIC"}),
+        controllino.ControllinoError,
+        id="error without job id",
+    ),
+    pytest.param(
+        controllino._encode({"command": "ERROR_PANIC"}),
+        controllino.ControllinoError,
+        id="general error",
+    ),
+    pytest.param(
+        controllino._encode({"command": "RX_UNKNOWN"}),
+        controllino.ControllinoError,
+        id="unexpected reply type",
+    ),
+    pytest.param(
+        controllino._encode({"cmd": "RX_UNKNOWN"}),
+        KeyError,
+        id='missing "command" field',
+    ),
+]
+
+
 class DummySerial:
     def __init__(self):
-        self._buffer = b""
-        self.write = mock.Mock()
-        self.close = mock.Mock()
+        self._buffer = bytearray()
+        self._pos = 0  # Read cursor into ``_buffer``
+        self._cond = threading.Condition()
+        self._cancelled = False
+        # Whether the reader waits for new data, i.e. it has processed
+        # all data that was put so far.
+        self._drained = False
+        self.timeout = None
+        self._writes = []  # Data passed to ``write``
+        self._closed = 0  # Number of calls to ``close``
 
     @property
     def in_waiting(self) -> int:
-        return len(self._buffer)
-
-    def put(self, data: str) -> None:
-        self._buffer += data
+        return len(self._buffer) - self._pos
+
+    def put(self, *data: bytes) -> None:
+        with self._cond:
+            for each in data:
+                self._buffer.extend(each)
+            self._drained = False
+            self._cond.notify_all()
+
+    def read(self, size: int = 1) -> bytes:
+        # Like ``serial.Serial.read``, block until data is available,
+        # ``timeout`` expires or the read is cancelled.
+        if self._closed:
+            # Like pyserial on POSIX, fail without a ``SerialException``.
+            raise TypeError("port is closed")
+        with self._cond:
+            if size and not self.in_waiting:
+                self._drained = True
+                self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: not size or self.in_waiting or self._cancelled, self.timeout
+            )
+            self._cancelled = False
+            # Copy through a view to avoid an intermediate ``bytearray``; the
+            # view must be released before the buffer is resized.
+            with memoryview(self._buffer) as view:
+                result = bytes(view[self._pos : self._pos + size])
+            self._pos += len(result)
+            if self._pos > 4096 or self._pos == len(self._buffer):
+                del self._buffer[: self._pos]
+                self._pos = 0
+            return result
+
+    def wait_drained(self, timeout: float = None) -> bool:
+        """Wait until the reader has processed all data put so far."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._drained, timeout)
+
+    def wait_written(self, count: int = 1, timeout: float = None) -> bool:
+        """Wait until ``write`` was called at least ``count`` times."""
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self._writes) >= count, timeout)
+
+    def write(self, data: bytes) -> None:
+        with self._cond:
+            self._writes.append(data)
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        self._closed += 1
+
+    def cancel_read(self) -> None:
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+
+class TestFuture:
+    def test_done(self):
+        future = controllino.Future()
+        assert not future.done()
+        future.set_result(123)
+        assert future.done()
 
-    def read(self, size: int = 1) -> str:
-        result = self._buffer[0:size]
-        self._buffer = self._buffer[size:]
-        return result
+    @pytest.mark.timeout(TIMEOUT)
+    def test_result_blocks_until_done(self):
+        future = controllino.Future()
+        timer = threading.Timer(WAIT, future.set_result, args=(123,))
+        timer.start()
+        assert future.result() == 123
+        timer.join()
 
 
-@pytest.mark.skip
-class TestMessageThread:
-    pass
+class TestCommand:
+    def test_missing_cmd_name(self):
+        with pytest.raises(TypeError):
 
+            class CmdNameless(controllino.Command):
+                def _serialize(self) -> dict:
+                    return {"command": "NAMELESS"}
 
-@pytest.mark.skip
-class TestCommandThread:
-    pass
+    def test_serialize_override(self):
+        class CmdSetSignalDelayed(controllino.CmdSetSignal):
+            def serialize(self) -> dict:
+                data = super().serialize()
+                data["delay"] = 5
+                return data
 
+        cmd = CmdSetSignalDelayed("DAC0", 12)
+        cmd.job = 1
+        assert cmd.encode() == controllino._encode(
+            {"command": "SET_OUTPUT", "pin": "DAC0", "level": 12, "job": 1, "delay": 5}
+        )
 
-@pytest.mark.skip
-class TestControllino:
-    pass
 
+def _handshake(base: controllino.Base) -> None:
+    future = base.open()
+    assert not future.done()
 
-class TestBase:
-    @pytest.mark.timeout(TIMEOUT)
-    def test_open(self):
-        base = controllino.Base(DummySerial())
-        future = base.open()
-        assert not future.wait(WAIT)
+    base._serial.put(FRAMES["rx_ready"])
 
-        with base._serial_lock:
-            cmd = {"command": "RX_READY", "job": 0}
-            base._serial.put(controllino._encode(cmd))
+    done = future.wait(WAIT)
+    base.process_errors()
+    assert done
 
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
 
-    @pytest.fixture
-    def base(self):
-        ser = DummySerial()
-        _base = controllino.Base(ser)
-        future = _base.open()
-        assert not future.wait(WAIT)
+def _open() -> controllino.Base:
+    base = controllino.Base(DummySerial())
+    _handshake(base)
+    return base
 
-        with _base._serial_lock:
-            cmd = {"command": "RX_READY", "job": 0}
-            _base._serial.put(controllino._encode(cmd))
 
-        done = future.wait(WAIT)
-        _base.process_errors()
-        assert done
-        yield _base
+def _kill(base: controllino.Base) -> None:
+    base.kill()
+    assert base._serial._closed == 1
 
-        _base.kill()
-        _base._serial.close.assert_called_once()
 
-    @pytest.mark.timeout(TIMEOUT)
-    def test_kill(self, base):
-        with base._serial_lock:
-            cmd = {"command": "RX_STOP", "job": 1}
-            base._serial.put(controllino._encode(cmd))
-        base.kill()
-        base._serial.close.assert_called_once()
-        base._serial.close.reset_mock()  # Reset for test at the end of ``base`` fixture!
+@pytest.fixture(scope="class")
+def shared_base():
+    base = _open()
+    yield base
+    _kill(base)
 
-    @pytest.mark.timeout(TIMEOUT)
-    def test_set_signal(self, base):
-        future = base.submit(controllino.CmdSetSignal("DAC0", 12))
-        assert not future.wait(WAIT)
-
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode(
-                    {"command": "SET_OUTPUT", "pin": "DAC0", "level": 12, "job": 1}
-                )
-            )
-            cmd = {"command": "RX_SET_OUTPUT", "pin": "DAC0", "level": 12, "job": 1}
-            base._serial.put(controllino._encode(cmd))
 
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
-        base.process_errors()
+@pytest.fixture
+def base(shared_base):
+    """The shared ``Base``, reset to its state after ``open``."""
+    assert shared_base._serial.wait_drained(TIMEOUT)
+    shared_base.process_errors()
+    shared_base._reset()
+    _handshake(shared_base)
+    shared_base._serial._writes.clear()
+    yield shared_base
+    assert shared_base.drain(TIMEOUT)
 
-    @pytest.mark.timeout(TIMEOUT)
-    def test_get_signal(self, base):
-        future = base.submit(controllino.CmdGetSignal("A0"))
-        assert not future.wait(WAIT)
 
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode({"command": "GET_INPUT", "pin": "A0", "job": 1})
-            )
-            value = 123
-            cmd = {"command": "RX_GET_INPUT", "pin": "A0", "level": value, "job": 1}
-            base._serial.put(controllino._encode(cmd))
+@pytest.fixture
+def private_base():
+    """A ``Base`` for tests which terminate its daemons."""
+    base = _open()
+    yield base
+    _kill(base)
 
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
-        assert future.result() == value
 
+class TestBase:
     @pytest.mark.timeout(TIMEOUT)
-    def test_set_pin_mode(self, base):
-        pin = "D30"
-        mode = "INPUT"
-        future = base.submit(controllino.CmdSetPinMode(pin, mode))
-        assert not future.wait(WAIT)
-
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode(
-                    {"command": "SET_PIN_MODE", "pin": pin, "mode": mode, "job": 1}
-                )
-            )
-            cmd = {"command": "RX_SET_PIN_MODE", "pin": pin, "mode": mode, "job": 1}
-            base._serial.put(controllino._encode(cmd))
-
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
-        base.process_errors()
+    def test_open(self):
+        base = controllino.Base(DummySerial())
+        future = base.open()
+        assert not future.done()
 
-    @pytest.mark.timeout(TIMEOUT)
-    def test_get_pin_mode(self, base):
-        pin = "D30"
-        mode = "INPUT"
-        future = base.submit(controllino.CmdGetPinMode(pin))
-        assert not future.wait(WAIT)
-
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode({"command": "GET_PIN_MODE", "pin": pin, "job": 1})
-            )
-            cmd = {"command": "RX_GET_PIN_MODE", "pin": pin, "mode": mode, "job": 1}
-            base._serial.put(controllino._encode(cmd))
+        base._serial.put(FRAMES["rx_ready"])
 
         done = future.wait(WAIT)
         base.process_errors()
         assert done
-        assert future.result() == mode
 
     @pytest.mark.timeout(TIMEOUT)
-    def test_load_pin_modes(self, base):
+    def test_drain(self, base):
         future = base.submit(controllino.CmdLoadPinModes())
-        assert not future.wait(WAIT)
+        assert not base.drain(0)
 
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode({"command": "LOAD_PIN_MODES", "job": 1})
-            )
-            cmd = {"command": "RX_LOAD_PIN_MODES", "job": 1}
-            base._serial.put(controllino._encode(cmd))
+        base._serial.put(FRAMES["rx_load_pin_modes"])
 
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
-        base.process_errors()
+        assert base.drain(TIMEOUT)
+        assert future.done()
 
     @pytest.mark.timeout(TIMEOUT)
-    def test_save_pin_modes(self, base):
-        future = base.submit(controllino.CmdSavePinModes())
-        assert not future.wait(WAIT)
-
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode({"command": "SAVE_PIN_MODES", "job": 1})
-            )
-            cmd = {"command": "RX_SAVE_PIN_MODES", "job": 1}
-            base._serial.put(controllino._encode(cmd))
-
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
-        base.process_errors()
-
-    @pytest.mark.timeout(TIMEOUT)
-    def test_reset_pin_modes(self, base):
-        future = base.submit(controllino.CmdResetPinModes())
-        assert not future.wait(WAIT)
+    def test_drain_declined_log_signal(self, base):
+        request, recording = base.submit(controllino.CmdLogSignal("A0", 1000))
+        assert not base.drain(0)
 
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode({"command": "RESET_PIN_MODES", "job": 1})
-            )
-            cmd = {"command": "RX_RESET_PIN_MODES", "job": 1}
-            base._serial.put(controllino._encode(cmd))
+        base._serial.put(FRAMES["err_log_signal"])
 
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
-        base.process_errors()
+        # The recording of a declined request is never done.
+        assert base.drain(TIMEOUT)
+        assert request.done()
+        assert not recording.done()
 
     @pytest.mark.timeout(TIMEOUT)
-    def test_trigger_pulse(self, base):
-        pin = "D40"
-        future = base.submit(controllino.CmdTriggerPulse(pin))
-        assert not future.wait(WAIT)
-
-        with base._serial_lock:
-            base._serial.write.assert_called_once_with(
-                controllino._encode({"command": "TRIGGER_PULSE", "pin": pin, "job": 1})
-            )
-            cmd = {"command": "RX_TRIGGER_PULSE", "pin": pin, "job": 1}
-            base._serial.put(controllino._encode(cmd))
-
-        done = future.wait(WAIT)
-        base.process_errors()
-        assert done
-        base.process_errors()
+    def test_kill(self, private_base):
+        base = private_base
+        base._serial.put(FRAMES["rx_stop"])
+        assert base._serial.wait_drained(TIMEOUT)
+        base.kill()
+        assert base._serial._closed == 1
+        # ``kill`` joins the daemons before closing the device.
+        assert not base._message_thread.is_alive()
+        assert not base._command_thread.is_alive()
+        with pytest.raises(controllino.ControllinoError):  # No job 1 pending
+            base.process_errors()
+        base.process_errors()  # The shutdown itself raised no error.
+        # Reset for test at the end of ``private_base`` fixture!
+        base._serial._closed = 0
 
     @pytest.mark.timeout(TIMEOUT)
     @pytest.mark.parametrize(
-        "cmd, error",
+        "cmd, tx, rx, expected",
         [
             pytest.param(
-                {"command": "RX_UNKNOWN", "job": 8},
-                controllino.ControllinoError,
-                id="unexpected job id",
+                controllino.CmdSetSignal("DAC0", 12),
+                FRAMES["set_output"],
+                FRAMES["rx_set_output"],
+                None,
+                id="set signal",
+            ),
+            pytest.param(
+                controllino.CmdGetSignal("A0"),
+                FRAMES["get_input"],
+                FRAMES["rx_get_input"],
+                123,
+                id="get signal",
+            ),
+            pytest.param(
+                controllino.CmdSetPinMode("D30", "INPUT"),
+                FRAMES["set_pin_mode"],
+                FRAMES["rx_set_pin_mode"],
+                None,
+                id="set pin mode",
+            ),
+            pytest.param(
+                controllino.CmdGetPinMode("D30"),
+                FRAMES["get_pin_mode"],
+                FRAMES["rx_get_pin_mode"],
+                "INPUT",
+                id="get pin mode",
             ),
             pytest.param(
-                {"command": "ERR_PANIC"},
-                controllino.ControllinoError,
-                id="error without job id",
+                controllino.CmdLoadPinModes(),
+                FRAMES["load_pin_modes"],
+                FRAMES["rx_load_pin_modes"],
+                None,
+                id="load pin modes",
             ),
             pytest.param(
-                {"command": "RX_UNKNOWN"},
-                controllino.ControllinoError,
-                id="unexpected reply type",
+                controllino.CmdSavePinModes(),
+                FRAMES["save_pin_modes"],
+                FRAMES["rx_save_pin_modes"],
+                None,
+                id="save pin modes",
+            ),
+            pytest.param(
+                controllino.CmdResetPinModes(),
+                FRAMES["reset_pin_modes"],
+                FRAMES["rx_reset_pin_modes"],
+                None,
+                id="reset pin modes",
+            ),
+            pytest.param(
+                controllino.CmdTriggerPulse("D40"),
+                FRAMES["trigger_pulse"],
+                FRAMES["rx_trigger_pulse"],
+                None,
+                id="trigger pulse",
             ),
-            pytest.param({"cmd": "RX_UNKNOWN"}, KeyError, id='missing "command" field'),
         ],
     )
-    def test_failure(self, cmd, error, base):
-        with base._serial_lock:
-            base._serial.put(controllino._encode(cmd))
-        time.sleep(WAIT)
+    def test_command(self, cmd, tx, rx, expected, base):
+        future = base.submit(cmd)
+        assert not future.done()
+
+        assert base._serial.wait_written(timeout=TIMEOUT)
+        assert base._serial._writes == [tx]
+        base._serial.put(rx)
+
+        done = future.wait(WAIT)
+        base.process_errors()
+        assert base._error_queue.empty()
+        assert done
+        assert future.result() == expected
+
+    @pytest.mark.timeout(TIMEOUT)
+    @pytest.mark.parametrize("msg, error", FAILURE_CASES)
+    def test_failure(self, msg, error, private_base):
+        base = private_base
+        base._serial.put(msg)
+        # If the error is fatal, the message daemon terminates without
+        # draining the buffer.
+        base._serial.wait_drained(WAIT)
         with pytest.raises(error):
             base.process_errors()
+        assert base._error_queue.empty()
 
     @pytest.mark.timeout(TIMEOUT)
     def test_failure_in_future(self, base):
         future = base.submit(controllino.CmdLoadPinModes())
+        base._serial.put(FRAMES["err_load_pin_modes"])
+
+        done = future.wait(WAIT)
+        base.process_errors()
+        assert done
+        with pytest.raises(controllino.ControllinoError):
+            future.result()
 
-        with base._serial_lock:
-            cmd = {"command": "ERR_LOAD_PIN_MODES", "job": 1}
-            base._serial.put(controllino._encode(cmd))
+    @pytest.mark.timeout(TIMEOUT)
+    def test_invalid_command(self, base):
+        future = base.submit(controllino.CmdLoadPinModes())
+        base._serial.put(FRAMES["err_command_invalid"])
 
         done = future.wait(WAIT)
         base.process_errors()
@@ -283,82 +461,30 @@ class TestBase:
     def test_log_signal(self, base):
         request, recording = base.submit(controllino.CmdLogSignal("A0", 1000))
 
-        with base._serial_lock:
-            base._serial.put(
-                controllino._encode(
-                    {
-                        "command": "RX_LOG_SIGNAL",
-                        "pin": "A0",
-                        "job": 1,
-                        "time": 0.0,
-                        "value": 1.0,
-                        "done": False,
-                    }
-                )
-            )
+        base._serial.put(FRAMES["rx_log_signal_0"])
 
         done = request.wait(WAIT)
         base.process_errors()
         request.result()  # Check for errors!
-        assert not recording.wait(WAIT)
-
-        with base._serial_lock:
-            base._serial.put(
-                controllino._encode(
-                    {
-                        "command": "RX_LOG_SIGNAL",
-                        "pin": "A0",
-                        "job": 1,
-                        "time": 1.0,
-                        "value": -0.5,
-                        "done": False,
-                    }
-                )
-            )
-            base._serial.put(
-                controllino._encode(
-                    {
-                        "command": "RX_LOG_SIGNAL",
-                        "pin": "A0",
-                        "job": 1,
-                        "time": 2.0,
-                        "value": -2.0,
-                        "done": False,
-                    }
-                )
-            )
+        assert base._serial.wait_drained(TIMEOUT)
+        assert not recording.done()
 
-        assert not recording.wait(WAIT)
-
-        with base._serial_lock:
-            base._serial.put(
-                controllino._encode(
-                    {
-                        "command": "RX_LOG_SIGNAL",
-                        "pin": "A0",
-                        "job": 1,
-                        "time": 3.0,
-                        "value": -3.5,
-                        "done": True,
-                    }
-                )
-            )
+        base._serial.put(
+            FRAMES["rx_log_signal_1"],
+            FRAMES["rx_log_signal_2"],
+            FRAMES["rx_log_signal_3"],
+        )
 
         done = recording.wait(WAIT)
         base.process_errors()
         assert done
         result = recording.result()
-        assert result.time == [0.0, 1.0, 2.0, 3.0]
-        assert result.values == [1.0, -0.5, -2.0, -3.5]
+        assert result.time == array.array("d", [0.0, 1.0, 2.0, 3.0])
+        assert result.values == array.array("d", [1.0, -0.5, -2.0, -3.5])
 
     def test_end_log_signal(self, base):
         future = base.submit(controllino.CmdEndLogSignal("A0"))
-        with base._serial_lock:
-            base._serial.put(
-                controllino._encode(
-                    {"command": "RX_END_LOG_SIGNAL", "pin": "A0", "job": 1}
-                )
-            )
+        base._serial.put(FRAMES["rx_end_log_signal"])
         done = future.wait(WAIT)
         base.process_errors()
         assert done
@@ -366,45 +492,49 @@ class TestBase:
     def test_multiple_jobs(self, base):
         future1 = base.submit(controllino.CmdGetSignal("A1"))
         future2 = base.submit(controllino.CmdGetSignal("A2"))
-        assert not future1.wait(WAIT)
-        assert not future2.wait(WAIT)
-
-        with base._serial_lock:
-            value1 = 123
-            value2 = 456
-            cmd = {"command": "RX_GET_INPUT", "pin": "A2", "level": value2, "job": 2}
-            base._serial.put(controllino._encode(cmd))
-            cmd = {"command": "RX_GET_INPUT", "pin": "A1", "level": value1, "job": 1}
-            base._serial.put(controllino._encode(cmd))
-
-        done1 = future1.wait(WAIT)
-        done2 = future2.wait(WAIT)
+        assert not future1.done()
+        assert not future2.done()
+
+        base._serial.put(FRAMES["rx_get_input_a2_job_2"], FRAMES["rx_get_input_a1"])
+
+        # The reply to job 2 is processed first, so waiting for the last
+        # reply suffices.
+        done = future1.wait(WAIT)
         base.process_errors()
-        assert done1
-        assert done2
-        assert future1.result() == value1
-        assert future2.result() == value2
+        assert done
+        assert future2.done()
+        assert future1.result() == 123
+        assert future2.result() == 456
 
     def test_error_correction(self, base):
         future = base.submit(controllino.CmdGetSignal("A2"))
-        assert not future.wait(WAIT)
+        assert not future.done()
 
-        with base._serial_lock:
-            value = -0.12
-            cmd = {"command": "RX_GET_INPUT", "pin": "A2", "level": value, "job": 1}
-            flawed_msg = b"_" + controllino._encode(cmd)
-            base._serial.put(flawed_msg)
+        flawed_msg = b"_" + FRAMES["rx_get_input_a2"]
+        base._serial.put(flawed_msg)
 
         assert future.wait(WAIT)
         base.process_errors()
-        assert future.result() == value
+        assert future.result() == -0.12
+
+    @pytest.mark.timeout(TIMEOUT)
+    def test_split_delimiter(self, base):
+        future = base.submit(controllino.CmdGetSignal("A0"))
+        msg = FRAMES["rx_get_input_level_1"]
+        base._serial.put(msg[:-1])
+        assert base._serial.wait_drained(TIMEOUT)
+        assert not future.done()
+        base._serial.put(msg[-1:])
+
+        done = future.wait(WAIT)
+        base.process_errors()
+        assert done
+        assert future.result() == 1
 
     def test_debug(self, base, capsys):
-        with base._serial_lock:
-            cmd = {"command": "DEBUG", "info": "foo"}
-            base._serial.put(controllino._encode(cmd))
+        base._serial.put(FRAMES["debug"])
 
-        time.sleep(WAIT)
+        assert base._serial.wait_drained(TIMEOUT)
         base.process_errors()
         captured = capsys.readouterr()
         assert captured.out == "foo\n"
@@ -0,0 +1,30 @@
+# SPDX-FileCopyrightText: 2021 8tronix GmbH, Forschungs- und Entwicklungszentrum Fachhochschule Kiel GmbH
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import pytest
+
+from controllino import _id
+
+
+class TestIdManager:
+    def test_pop_round_robin(self):
+        manager = _id.IdManager(3)
+        first = manager.pop()
+        assert first == 0
+        manager.put(first)
+        assert [manager.pop() for _ in range(3)] == [1, 2, 0]
+
+    def test_reset(self):
+        manager = _id.IdManager(3)
+        manager.pop()
+        manager.pop()
+        manager.reset()
+        assert [manager.pop() for _ in range(3)] == [0, 1, 2]
+
+    def test_pop_exceeded(self):
+        manager = _id.IdManager(2)
+        manager.pop()
+        manager.pop()
+        with pytest.raises(RuntimeError):
+            manager.pop()